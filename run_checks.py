@@ -1,11 +1,11 @@
 import argparse
+import json
 import logging
+import time
 from datetime import datetime, timezone
 from urllib.parse import urlparse
 import os as _os
 import sys as _sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
 
 # Гарантируем доступность корня и src/ для импорта
 _ROOT = _os.path.dirname(_os.path.abspath(__file__))
@@ -15,17 +15,24 @@ if _ROOT not in _sys.path:
 if _SRC not in _sys.path:
     _sys.path.append(_SRC)
 
+# Здесь только лёгкие модули. selenium, gspread, requests и openpyxl
+# импортируются лениво — в тех подкомандах, которым они действительно нужны.
 from src.config import load_config
 from src.logging_setup import setup_logging
-from src.selenium_checker import check_url_with_driver, build_driver
-from src.sheets_appender import append_negative_result, get_sheet_url
-from src.telegram_alerts import send_telegram_alert
 from src.url_source import load_groups
-from src.escalation import update_status_for_check
+from src.escalation import load_stats, update_status_for_check
 
 
-def _check_url_parallel(url: str, cfg) -> tuple[str, list[str], int, int]:
-    driver = build_driver(
+SUBCOMMANDS = ("run", "list-groups", "validate", "state-show", "replay", "diff")
+
+# Сколько провайдеров перечислять в одном алерте (лимит длины сообщения Telegram)
+PROVIDER_ALERT_MAX_ITEMS = 20
+
+
+def _build_driver(cfg):
+    from src.selenium_checker import build_driver
+
+    return build_driver(
         headless=cfg.headless,
         wait_seconds=cfg.wait_timeout_seconds,
         page_load_strategy=cfg.page_load_strategy,
@@ -33,170 +40,576 @@ def _check_url_parallel(url: str, cfg) -> tuple[str, list[str], int, int]:
         disable_css=cfg.disable_css,
         disable_fonts=cfg.disable_fonts,
     )
+
+
+def _check_url_parallel(url: str, cfg) -> tuple[str, list[str], list[str], int, int, datetime, int, Exception | None]:
+    """
+    Проверка URL в отдельном потоке со своим драйвером.
+    Возвращает (url, без_абонплаты, провайдеры_проверенных_карточек, проверено, всего_карточек,
+    начало, длительность_мс, ошибка).
+    Ошибку не пробрасывает, а возвращает последним элементом вместе с замером времени.
+    """
+    from src.selenium_checker import check_url_providers
+
+    started_at, started = datetime.now(timezone.utc), time.monotonic()
     try:
-        missing, total, checked = check_url_with_driver(
-            driver=driver,
-            url=url,
-            wait_seconds=cfg.wait_timeout_seconds,
+        driver = _build_driver(cfg)
+        try:
+            missing, providers, checked, total = check_url_providers(
+                driver=driver,
+                url=url,
+                wait_seconds=cfg.wait_timeout_seconds,
+            )
+        finally:
+            driver.quit()
+    except Exception as exc:  # noqa: BLE001
+        return url, [], [], 0, 0, started_at, _elapsed_ms(started), exc
+    return url, missing, providers, checked, total, started_at, _elapsed_ms(started), None
+
+
+def _elapsed_ms(started: float) -> int:
+    return int((time.monotonic() - started) * 1000)
+
+
+def _send_page_alert(cfg, url: str, sheet_url: str) -> None:
+    from src.telegram_alerts import send_telegram_alert
+
+    domain = urlparse(url).netloc
+    message = (
+        "Пропало поле «Абонентская плата»\n"
+        f"Сайт: {domain}\n"
+        f"Страница: {url}\n"
+        f"Ссылка на отчёт: {sheet_url}"
+    )
+    send_telegram_alert(
+        enabled=cfg.alerts_enabled,
+        bot_token=cfg.bot_token,
+        chat_id=cfg.chat_id,
+        message=message,
+    )
+
+
+def _report_error(cfg, url: str, exc: Exception, stats_lock=None) -> bool:
+    """
+    Логирует ошибку проверки URL и засчитывает её в эскалацию страницы. Сбой браузера
+    (драйвер не запустился, сессия потеряна) — инфраструктурная ошибка: статус не трогаем.
+    Возвращает True, если это сбой браузера.
+    """
+    from contextlib import nullcontext
+
+    from src.selenium_checker import is_browser_failure
+
+    if is_browser_failure(exc):
+        logging.error("Инфраструктурная ошибка при обработке %s: %s", url, exc)
+        return True
+    logging.error("Ошибка при обработке %s: %s", url, exc)
+    with stats_lock or nullcontext():
+        update_status_for_check(cfg.stats_file, url, is_failure=True)
+    return False
+
+
+def _report_result(
+    cfg, url: str, missing: list[str], total: int, checked: int, sheet_url: str, stats_lock=None, pending_alerts=None
+) -> bool:
+    """
+    Логирует результат проверки URL, пишет негатив в Google Sheets, обновляет статус и шлёт алерт.
+    Если передан pending_alerts, падение страницы откладывается туда как (url, missing) до сводки
+    по провайдерам: счётчик эскалации и алерт — в _flush_page_alerts. Так прогон, убитый до сводки,
+    не оставляет сдвинутых счётчиков без отправленных алертов. Возвращает True, если страница проблемная.
+    """
+    from contextlib import nullcontext
+
+    from src.sheets_appender import append_negative_result
+
+    lock = stats_lock or nullcontext()
+    if not missing:
+        logging.info("URL: %s | карточек: %d, проверено: %d, все ок", url, total, checked)
+        with lock:
+            update_status_for_check(cfg.stats_file, url, is_failure=False)
+        return False
+
+    logging.warning("URL: %s | карточек: %d, проверено: %d, без абонплаты: %s", url, total, checked, ", ".join(missing))
+
+    append_negative_result(
+        sheet_id=cfg.sheet_id,
+        service_account_json=cfg.google_service_account_json,
+        worksheet_title=cfg.sheet_worksheet_title,
+        url=url,
+        when_utc=datetime.now(timezone.utc),
+        providers_without_fee=missing,
+    )
+
+    if pending_alerts is not None:
+        pending_alerts.append((url, list(missing)))
+        return True
+    with lock:
+        should_alert = update_status_for_check(cfg.stats_file, url, is_failure=True)
+    if should_alert:
+        _send_page_alert(cfg, url, sheet_url)
+    return True
+
+
+def _flush_page_alerts(cfg, pending_alerts, flagged_keys, sheet_url: str) -> None:
+    """
+    Засчитывает отложенные падения страниц в эскалацию и отправляет положенные по схеме алерты,
+    кроме страниц, где все провайдеры без абонплаты входят в flagged_keys (массовая проблема провайдера).
+    """
+    from src.escalation import update_statuses_for_checks
+    from src.provider_index import normalize_provider_name
+
+    due = set(update_statuses_for_checks(cfg.stats_file, {url: True for url, _missing in pending_alerts}))
+    suppressed = 0
+    for url, missing in pending_alerts:
+        # URL может встречаться в нескольких группах — алерт по нему один
+        if url not in due:
+            continue
+        due.discard(url)
+        if missing and all(normalize_provider_name(name) in flagged_keys for name in missing):
+            suppressed += 1
+            continue
+        _send_page_alert(cfg, url, sheet_url)
+    if suppressed:
+        logging.info("Алертов по страницам не отправлено (покрыты массовой проблемой провайдера): %d", suppressed)
+
+
+def _check_urls_isolated(cfg, urls: list[str], workers: int, group: str, report, index, sheet_url: str, pending_alerts) -> bool:
+    from src.process_pool import iter_isolated_checks
+
+    engine = "selenium/process"
+    any_failures = False
+    for outcome in iter_isolated_checks(cfg, urls, workers):
+        url = outcome.url
+        if outcome.error_class:
+            report.record(group, url, 0, 0, [], outcome.started_at, outcome.duration_ms, engine, outcome.error_class)
+            any_failures = True
+            if outcome.infra_error:
+                # Сбой воркера/браузера, а не пропажа абонплаты: статус эскалации и Google Sheets не трогаем
+                logging.error("Инфраструктурная ошибка при обработке %s: %s", url, outcome.error_message)
+                continue
+            logging.error("Ошибка при обработке %s: %s", url, outcome.error_message)
+            update_status_for_check(cfg.stats_file, url, is_failure=True)
+            continue
+
+        report.record(group, url, outcome.total, outcome.checked, outcome.missing, outcome.started_at, outcome.duration_ms, engine)
+        index.add_page(group, url, outcome.providers, outcome.missing)
+        if _report_result(cfg, url, outcome.missing, outcome.total, outcome.checked, sheet_url, pending_alerts=pending_alerts):
+            any_failures = True
+    return any_failures
+
+
+def _check_urls(
+    cfg, urls: list[str], workers: int, group: str, report, index, isolation: str = "thread", pending_alerts=None
+) -> bool:
+    """
+    Проверяет список URL: последовательно одним драйвером, пулом потоков
+    или (isolation="process") отдельными процессами под надзором супервизора.
+    Каждый результат пишется в отчёт прогона и в индекс провайдеров.
+    pending_alerts — см. _report_result.
+    Возвращает True, если была хотя бы одна проблемная страница или ошибка.
+    """
+    from src.sheets_appender import get_sheet_url
+
+    sheet_url = get_sheet_url(cfg.sheet_id) or ""
+    any_failures = False
+
+    if isolation == "process":
+        return _check_urls_isolated(cfg, urls, workers, group, report, index, sheet_url, pending_alerts)
+
+    if workers == 1:
+        from src.selenium_checker import check_url_providers
+
+        engine = "selenium/serial"
+        driver = _build_driver(cfg)
+        try:
+            for url in urls:
+                started_at, started = datetime.now(timezone.utc), time.monotonic()
+                try:
+                    missing, providers, checked, total = check_url_providers(
+                        driver=driver,
+                        url=url,
+                        wait_seconds=cfg.wait_timeout_seconds,
+                    )
+                except Exception as exc:  # noqa: BLE001
+                    report.record(group, url, 0, 0, [], started_at, _elapsed_ms(started), engine, type(exc).__name__)
+                    any_failures = True
+                    if _report_error(cfg, url, exc):
+                        # Сессия потеряна — остальные URL этим драйвером не проверить
+                        try:
+                            driver.quit()
+                        except Exception:  # noqa: BLE001
+                            pass
+                        driver = _build_driver(cfg)
+                    continue
+                report.record(group, url, total, checked, missing, started_at, _elapsed_ms(started), engine)
+                index.add_page(group, url, providers, missing)
+                if _report_result(cfg, url, missing, total, checked, sheet_url, pending_alerts=pending_alerts):
+                    any_failures = True
+        finally:
+            driver.quit()
+        return any_failures
+
+    import threading
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    engine = "selenium/threads"
+    stats_lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_check_url_parallel, url, cfg) for url in urls]
+        for future in as_completed(futures):
+            url, missing, providers, checked, total, started_at, duration_ms, exc = future.result()
+            if exc is not None:
+                report.record(group, url, 0, 0, [], started_at, duration_ms, engine, type(exc).__name__)
+                _report_error(cfg, url, exc, stats_lock)
+                any_failures = True
+                continue
+
+            report.record(group, url, total, checked, missing, started_at, duration_ms, engine)
+            index.add_page(group, url, providers, missing)
+            if _report_result(cfg, url, missing, total, checked, sheet_url, stats_lock, pending_alerts):
+                any_failures = True
+    return any_failures
+
+
+def _send_success_alert(cfg, group_names) -> None:
+    from src.sheets_appender import get_sheet_url
+    from src.telegram_alerts import send_telegram_alert
+
+    groups_list = ", ".join(sorted(group_names))
+    sheet_url = get_sheet_url(cfg.sheet_id) or ""
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S %Z")
+    send_telegram_alert(
+        enabled=True,
+        bot_token=cfg.bot_token,
+        chat_id=cfg.chat_id,
+        message=(
+            "Проверка прошла успешно\n"
+            f"Группы: {groups_list}\n"
+            f"Ссылка на отчёт: {sheet_url}\n"
+            f"Время проверки: {ts}"
+        ),
+    )
+
+
+def _emit_provider_summary(cfg, index, run_id: str, pending_alerts=None, provider_alerts: bool = True) -> None:
+    """
+    Пишет сводку индекса провайдеров в лог и REPORTS_DIR. При PROVIDER_ALERTS_ENABLED
+    шлёт алерт по провайдерам (с эскалацией 1/4/12/каждые 10 по провайдеру) и отправляет
+    отложенные алерты по страницам, кроме тех, где все провайдеры без абонплаты уже покрыты
+    массовой проблемой. provider_alerts=False (replay: только падающие URL, доли смещены) —
+    только сводка.
+    """
+    from src.provider_index import SAMPLE_URLS, normalize_provider_name, select_alert_providers
+
+    summary = index.summary()
+    if summary:
+        path = _os.path.join(cfg.reports_dir, f"providers-{run_id}.json")
+        index.write_json(path)
+        broken = [s for s in summary if s.missing_pages]
+        logging.info("Сводка по провайдерам: всего %d, без абонплаты %d (%s)", len(summary), len(broken), path)
+        for s in broken:
+            logging.warning(
+                "Провайдер: %s | без абонплаты на %d из %d стр. (%.0f%%) | группы: %s | например: %s",
+                s.name, s.missing_pages, s.checked_pages, s.missing_ratio * 100, ", ".join(s.groups),
+                ", ".join(s.missing_urls[:SAMPLE_URLS]),
+            )
+
+    if not (cfg.provider_alerts_enabled and provider_alerts):
+        return
+
+    from src.escalation import update_statuses_for_checks
+    from src.sheets_appender import get_sheet_url
+    from src.telegram_alerts import send_telegram_alert
+
+    sheet_url = get_sheet_url(cfg.sheet_id) or ""
+    flagged = select_alert_providers(summary, cfg.provider_alert_min_pages, cfg.provider_alert_min_ratio)
+    flagged_keys = {normalize_provider_name(s.name) for s in flagged}
+
+    # Эскалация по провайдерам, проверенным в этом прогоне: массовая проблема — «падение»
+    to_alert = set(
+        update_statuses_for_checks(
+            cfg.provider_stats_file,
+            {normalize_provider_name(s.name): normalize_provider_name(s.name) in flagged_keys for s in summary},
+        )
+    )
+    alerted = [s for s in flagged if normalize_provider_name(s.name) in to_alert]
+    if alerted:
+        lines = ["Массово пропало поле «Абонентская плата» у провайдеров"]
+        for s in alerted[:PROVIDER_ALERT_MAX_ITEMS]:
+            lines.append(f"{s.name}: {s.missing_pages} из {s.checked_pages} стр. (группы: {', '.join(s.groups)})")
+            lines.extend(f"  {url}" for url in s.missing_urls[:SAMPLE_URLS])
+        if len(alerted) > PROVIDER_ALERT_MAX_ITEMS:
+            lines.append(f"…и ещё провайдеров: {len(alerted) - PROVIDER_ALERT_MAX_ITEMS}")
+        lines.append(f"Ссылка на отчёт: {sheet_url}")
+        send_telegram_alert(
+            enabled=cfg.alerts_enabled,
+            bot_token=cfg.bot_token,
+            chat_id=cfg.chat_id,
+            message="\n".join(lines),
         )
-        return url, missing, total, checked
-    finally:
-        driver.quit()
 
+    if pending_alerts:
+        _flush_page_alerts(cfg, pending_alerts, flagged_keys, sheet_url)
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Проверка наличия поля 'Абонентская плата' в карточках провайдеров")
-    parser.add_argument("--group", help="Имя группы (лист Excel или имя файла без .txt)", default=None)
-    parser.add_argument("--workers", type=int, default=1, help="Параллельных потоков на группу (>=1)")
-    args = parser.parse_args()
 
-    config = load_config()
-    setup_logging(config.log_dir)
+def _flush_page_alerts_on_abort(cfg, pending_alerts) -> None:
+    """Отправляет отложенные алерты прерванного прогона, не маскируя исходную ошибку своей."""
+    from src.sheets_appender import get_sheet_url
 
     try:
-        groups = load_groups(config.urls_dir)
+        _flush_page_alerts(cfg, pending_alerts, set(), get_sheet_url(cfg.sheet_id) or "")
+    except Exception:  # noqa: BLE001
+        logging.exception("Не удалось отправить отложенные алерты по страницам прерванного прогона")
+
+
+def _load_selected_groups(cfg, group_name):
+    """Загружает группы URL и отбирает нужную. При ошибке логирует её и возвращает None."""
+    try:
+        groups = load_groups(cfg.urls_dir)
     except FileNotFoundError as exc:
         logging.error(str(exc))
-        return 2
+        return None
 
     if not groups:
         logging.error("Не найдено ни одной группы URL")
+        return None
+
+    if group_name:
+        if group_name not in groups:
+            logging.error("Группа '%s' не найдена. Доступные: %s", group_name, ", ".join(sorted(groups.keys())))
+            return None
+        return {group_name: groups[group_name]}
+    return groups
+
+
+def cmd_run(args, config) -> int:
+    selected = _load_selected_groups(config, args.group)
+    if selected is None:
         return 2
 
-    if args.group:
-        if args.group not in groups:
-            logging.error("Группа '%s' не найдена. Доступные: %s", args.group, ", ".join(sorted(groups.keys())))
-            return 2
-        selected = {args.group: groups[args.group]}
-    else:
-        selected = groups
+    from src.provider_index import ProviderIndex
+    from src.run_report import RunReport
 
+    workers = max(1, args.workers)
     any_failures = False
-    for group_name, urls in selected.items():
-        logging.info("Группа: %s (кол-во URL: %d, workers=%d)", group_name, len(urls), max(1, args.workers))
-
-        if max(1, args.workers) == 1:
-            driver = build_driver(
-                headless=config.headless,
-                wait_seconds=config.wait_timeout_seconds,
-                page_load_strategy=config.page_load_strategy,
-                disable_images=config.disable_images,
-                disable_css=config.disable_css,
-                disable_fonts=config.disable_fonts,
-            )
-            try:
-                for url in urls:
-                    missing, total, checked = check_url_with_driver(
-                        driver=driver,
-                        url=url,
-                        wait_seconds=config.wait_timeout_seconds,
-                    )
-                    is_failure = bool(missing)
-                    if is_failure:
-                        any_failures = True
-                        logging.warning("URL: %s | карточек: %d, проверено: %d, без абонплаты: %s", url, total, checked, ", ".join(missing))
-
-                        append_negative_result(
-                            sheet_id=config.sheet_id,
-                            service_account_json=config.google_service_account_json,
-                            worksheet_title=config.sheet_worksheet_title,
-                            url=url,
-                            when_utc=datetime.now(timezone.utc),
-                            providers_without_fee=missing,
-                        )
-
-                        should_alert = update_status_for_check(config.stats_file, url, is_failure=True)
-                        if should_alert:
-                            parsed = urlparse(url)
-                            domain = parsed.netloc
-                            sheet_url = get_sheet_url(config.sheet_id) or ""
-                            message = (
-                                "Пропало поле «Абонентская плата»\n"
-                                f"Сайт: {domain}\n"
-                                f"Страница: {url}\n"
-                                f"Ссылка на отчёт: {sheet_url}"
-                            )
-                            send_telegram_alert(
-                                enabled=config.alerts_enabled,
-                                bot_token=config.bot_token,
-                                chat_id=config.chat_id,
-                                message=message,
-                            )
-                    else:
-                        logging.info("URL: %s | карточек: %d, проверено: %d, все ок", url, total, checked)
-                        update_status_for_check(config.stats_file, url, is_failure=False)
-            finally:
-                driver.quit()
-        else:
-            sheet_url = get_sheet_url(config.sheet_id) or ""
-            stats_lock = threading.Lock()
-            with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
-                future_to_url = {executor.submit(_check_url_parallel, url, config): url for url in urls}
-                for future in as_completed(future_to_url):
-                    url = future_to_url[future]
-                    try:
-                        url, missing, total, checked = future.result()
-                    except Exception as exc:  # noqa: BLE001
-                        logging.error("Ошибка при обработке %s: %s", url, exc)
-                        with stats_lock:
-                            update_status_for_check(config.stats_file, url, is_failure=True)
-                        any_failures = True
-                        continue
-
-                    is_failure = bool(missing)
-                    if is_failure:
-                        any_failures = True
-                        logging.warning("URL: %s | карточек: %d, проверено: %d, без абонплаты: %s", url, total, checked, ", ".join(missing))
-
-                        append_negative_result(
-                            sheet_id=config.sheet_id,
-                            service_account_json=config.google_service_account_json,
-                            worksheet_title=config.sheet_worksheet_title,
-                            url=url,
-                            when_utc=datetime.now(timezone.utc),
-                            providers_without_fee=missing,
-                        )
-
-                        with stats_lock:
-                            should_alert = update_status_for_check(config.stats_file, url, is_failure=True)
-                        if should_alert:
-                            parsed = urlparse(url)
-                            domain = parsed.netloc
-                            message = (
-                                "Пропало поле «Абонентская плата»\n"
-                                f"Сайт: {domain}\n"
-                                f"Страница: {url}\n"
-                                f"Ссылка на отчёт: {sheet_url}"
-                            )
-                            send_telegram_alert(
-                                enabled=config.alerts_enabled,
-                                bot_token=config.bot_token,
-                                chat_id=config.chat_id,
-                                message=message,
-                            )
-                    else:
-                        logging.info("URL: %s | карточек: %d, проверено: %d, все ок", url, total, checked)
-                        with stats_lock:
-                            update_status_for_check(config.stats_file, url, is_failure=False)
+    report = RunReport(config.reports_dir)
+    index = ProviderIndex()
+    # С алертами по провайдерам падения страниц (эскалация и алерты) откладываются до сводки
+    pending_alerts = [] if config.provider_alerts_enabled else None
+    try:
+        for group_name, urls in selected.items():
+            logging.info("Группа: %s (кол-во URL: %d, workers=%d, isolation=%s)", group_name, len(urls), workers, args.isolation)
+            if _check_urls(config, urls, workers, group_name, report, index, args.isolation, pending_alerts):
+                any_failures = True
+    except BaseException:
+        # Прерванный прогон: индекс неполон, поэтому без сводки и эскалации провайдеров —
+        # только отложенные алерты по страницам (без подавления)
+        if pending_alerts:
+            _flush_page_alerts_on_abort(config, pending_alerts)
+        raise
+    finally:
+        report.close()
+
+    _emit_provider_summary(config, index, report.run_id, pending_alerts)
 
     if not any_failures and config.success_alerts_enabled:
-        groups_list = ", ".join(sorted(selected.keys()))
-        sheet_url = get_sheet_url(config.sheet_id) or ""
-        ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S %Z")
-        send_telegram_alert(
-            enabled=True,
-            bot_token=config.bot_token,
-            chat_id=config.chat_id,
-            message=(
-                "Проверка прошла успешно\n"
-                f"Группы: {groups_list}\n"
-                f"Ссылка на отчёт: {sheet_url}\n"
-                f"Время проверки: {ts}"
-            ),
-        )
+        _send_success_alert(config, selected.keys())
 
     return 1 if any_failures else 0
 
 
+def cmd_list_groups(args, config) -> int:
+    selected = _load_selected_groups(config, None)
+    if selected is None:
+        return 2
+    for group_name, urls in sorted(selected.items()):
+        print(f"{group_name}\t{len(urls)}")
+    return 0
+
+
+def _validate_url(url: str):
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https"):
+        return "схема должна быть http/https"
+    if not parsed.netloc:
+        return "не указан домен"
+    if any(ch.isspace() for ch in url):
+        return "URL содержит пробелы"
+    return None
+
+
+def cmd_validate(args, config) -> int:
+    selected = _load_selected_groups(config, args.group)
+    if selected is None:
+        return 2
+
+    problems = 0
+    for group_name, urls in selected.items():
+        seen: set[str] = set()
+        for url in urls:
+            reason = _validate_url(url)
+            if reason is None and url in seen:
+                reason = "дубликат"
+            seen.add(url)
+            if reason:
+                problems += 1
+                print(f"{group_name}\t{url}\t{reason}")
+    if problems:
+        logging.error("Найдено некорректных URL: %d", problems)
+        return 1
+    logging.info("Все URL корректны (групп: %d)", len(selected))
+    return 0
+
+
+def cmd_state_show(args, config) -> int:
+    stats = load_stats(config.stats_file)
+    if args.failing:
+        stats = {url: st for url, st in stats.items() if st.consecutive_failures > 0}
+
+    if args.json:
+        raw = {
+            url: {
+                "consecutive_failures": st.consecutive_failures,
+                "first_failure_ts": st.first_failure_ts,
+                "last_check_ts": st.last_check_ts,
+            }
+            for url, st in sorted(stats.items())
+        }
+        print(json.dumps(raw, ensure_ascii=False, indent=2))
+        return 0
+
+    for url, st in sorted(stats.items()):
+        print(f"{url}\t{st.consecutive_failures}\t{st.first_failure_ts or '-'}\t{st.last_check_ts or '-'}")
+    return 0
+
+
+def cmd_replay(args, config) -> int:
+    if args.url:
+        urls = list(dict.fromkeys(args.url))
+    else:
+        stats = load_stats(config.stats_file)
+        urls = sorted(url for url, st in stats.items() if st.consecutive_failures > 0)
+
+    if not urls:
+        logging.info("Нет URL для повторной проверки")
+        return 0
+
+    from src.provider_index import ProviderIndex
+    from src.run_report import RunReport
+
+    workers = max(1, args.workers)
+    logging.info("Повторная проверка (кол-во URL: %d, workers=%d, isolation=%s)", len(urls), workers, args.isolation)
+    report = RunReport(config.reports_dir, kind="replay")
+    index = ProviderIndex()
+    try:
+        any_failures = _check_urls(config, urls, workers, "replay", report, index, args.isolation)
+    finally:
+        report.close()
+        _emit_provider_summary(config, index, report.run_id, provider_alerts=False)
+    return 1 if any_failures else 0
+
+
+def cmd_diff(args, config) -> int:
+    from src.run_report import diff_runs, latest_comparable_runs, load_run, resolve_run
+
+    try:
+        if args.old and args.new:
+            old_path = resolve_run(config.reports_dir, args.old)
+            new_path = resolve_run(config.reports_dir, args.new)
+        elif args.old or args.new:
+            logging.error("Укажите оба прогона или ни одного (тогда сравниваются два последних с теми же группами)")
+            return 2
+        else:
+            pair = latest_comparable_runs(config.reports_dir)
+            if pair is None:
+                logging.error("В %s нет двух обычных прогонов с одинаковым набором групп", config.reports_dir)
+                return 2
+            old_path, new_path = pair
+    except FileNotFoundError as exc:
+        logging.error(str(exc))
+        return 2
+
+    result = diff_runs(load_run(old_path), load_run(new_path))
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"Сравнение: {old_path} -> {new_path}")
+    sections = (
+        ("Новые проблемные страницы", result["newly_broken_pages"]),
+        ("Исправленные страницы", result["newly_fixed_pages"]),
+        ("Новые провайдеры без абонплаты", [f"{url}\t{name}" for url, name in result["newly_broken_providers"]]),
+        ("Провайдеры, у которых абонплата вернулась", [f"{url}\t{name}" for url, name in result["newly_fixed_providers"]]),
+    )
+    for title, items in sections:
+        print(f"{title}: {len(items)}")
+        for item in items:
+            print(f"  {item}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Проверка наличия поля 'Абонентская плата' в карточках провайдеров")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p_run = subparsers.add_parser("run", help="Проверить группы URL (по умолчанию)")
+    p_run.add_argument("--group", help="Имя группы (лист Excel или имя файла без .txt)", default=None)
+    p_run.add_argument("--workers", type=int, default=1, help="Параллельных потоков/процессов на группу (>=1)")
+    p_run.add_argument(
+        "--isolation",
+        choices=("thread", "process"),
+        default="thread",
+        help="thread — потоки в одном процессе; process — отдельный процесс с браузером на воркер, "
+        "с дедлайном на URL и лимитами RSS/CPU",
+    )
+    p_run.set_defaults(func=cmd_run)
+
+    p_list = subparsers.add_parser("list-groups", help="Показать группы URL и количество страниц")
+    p_list.set_defaults(func=cmd_list_groups)
+
+    p_validate = subparsers.add_parser("validate", help="Проверить корректность файлов с URL без запуска браузера")
+    p_validate.add_argument("--group", help="Имя группы (лист Excel или имя файла без .txt)", default=None)
+    p_validate.set_defaults(func=cmd_validate)
+
+    p_state = subparsers.add_parser("state-show", help="Показать состояние эскалации по URL")
+    p_state.add_argument("--failing", action="store_true", help="Только URL с текущими падениями")
+    p_state.add_argument("--json", action="store_true", help="Вывод в JSON")
+    p_state.set_defaults(func=cmd_state_show)
+
+    p_replay = subparsers.add_parser("replay", help="Перепроверить падающие URL из состояния (или заданные --url)")
+    p_replay.add_argument("--url", action="append", default=None, help="URL для перепроверки (можно несколько раз)")
+    p_replay.add_argument("--workers", type=int, default=1, help="Параллельных потоков/процессов (>=1)")
+    p_replay.add_argument(
+        "--isolation",
+        choices=("thread", "process"),
+        default="thread",
+        help="thread — потоки в одном процессе; process — отдельный процесс с браузером на воркер, "
+        "с дедлайном на URL и лимитами RSS/CPU",
+    )
+    p_replay.set_defaults(func=cmd_replay)
+
+    p_diff = subparsers.add_parser("diff", help="Сравнить два прогона (по умолчанию — два последних обычных прогона с теми же группами)")
+    p_diff.add_argument("old", nargs="?", default=None, help="run_id или путь к отчёту предыдущего прогона")
+    p_diff.add_argument("new", nargs="?", default=None, help="run_id или путь к отчёту нового прогона")
+    p_diff.add_argument("--json", action="store_true", help="Вывод в JSON")
+    p_diff.set_defaults(func=cmd_diff)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    argv = list(_sys.argv[1:] if argv is None else argv)
+    # Обратная совместимость: `run_checks.py --group mol` == `run_checks.py run --group mol`
+    if not argv or (argv[0] not in SUBCOMMANDS and argv[0] not in ("-h", "--help")):
+        argv.insert(0, "run")
+
+    args = build_parser().parse_args(argv)
+
+    config = load_config()
+    setup_logging(config.log_dir)
+
+    return args.func(args, config)
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
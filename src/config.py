@@ -10,6 +10,24 @@ def _parse_bool(value: Optional[str], default: bool) -> bool:
     return value.strip().lower() in {"1", "true", "yes", "y", "on"}
 
 
+def _parse_int(value: Optional[str], default: int) -> int:
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def _parse_float(value: Optional[str], default: float) -> float:
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
 @dataclass
 class Config:
     urls_dir: str
@@ -22,8 +40,20 @@ class Config:
     google_service_account_json: Optional[str]
     sheet_worksheet_title: Optional[str]
     wait_timeout_seconds: int
+    page_load_strategy: str
+    disable_images: bool
+    disable_css: bool
+    disable_fonts: bool
     log_dir: str
     stats_file: str
+    reports_dir: str
+    url_deadline_seconds: int
+    worker_max_rss_mb: int
+    worker_max_cpu_percent: int
+    provider_alerts_enabled: bool
+    provider_alert_min_pages: int
+    provider_alert_min_ratio: float
+    provider_stats_file: str
 
 
 def load_config() -> Config:
@@ -47,8 +77,25 @@ def load_config() -> Config:
     except ValueError:
         wait_timeout_seconds = 15
 
+    page_load_strategy = os.getenv("PAGE_LOAD_STRATEGY", "eager")
+    disable_images = _parse_bool(os.getenv("DISABLE_IMAGES", "true"), True)
+    disable_css = _parse_bool(os.getenv("DISABLE_CSS", "true"), True)
+    disable_fonts = _parse_bool(os.getenv("DISABLE_FONTS", "true"), True)
+
     log_dir = os.getenv("LOG_DIR", "logs")
     stats_file = os.getenv("STATS_FILE", "data/stat_prov.json")
+    reports_dir = os.getenv("REPORTS_DIR", "data/runs")
+
+    # Лимиты воркеров в режиме --isolation process (0 — лимит отключён)
+    url_deadline_seconds = _parse_int(os.getenv("URL_DEADLINE_SECONDS"), 180)
+    worker_max_rss_mb = _parse_int(os.getenv("WORKER_MAX_RSS_MB"), 2048)
+    worker_max_cpu_percent = _parse_int(os.getenv("WORKER_MAX_CPU_PERCENT"), 0)
+
+    # Алерт по провайдеру, у которого абонплата пропала сразу на многих страницах
+    provider_alerts_enabled = _parse_bool(os.getenv("PROVIDER_ALERTS_ENABLED", "false"), False)
+    provider_alert_min_pages = _parse_int(os.getenv("PROVIDER_ALERT_MIN_PAGES"), 5)
+    provider_alert_min_ratio = _parse_float(os.getenv("PROVIDER_ALERT_MIN_RATIO"), 0.5)
+    provider_stats_file = os.getenv("PROVIDER_STATS_FILE", "data/stat_providers.json")
 
     return Config(
         urls_dir=urls_dir,
@@ -61,6 +108,18 @@ def load_config() -> Config:
         google_service_account_json=google_service_account_json,
         sheet_worksheet_title=sheet_worksheet_title,
         wait_timeout_seconds=wait_timeout_seconds,
+        page_load_strategy=page_load_strategy,
+        disable_images=disable_images,
+        disable_css=disable_css,
+        disable_fonts=disable_fonts,
         log_dir=log_dir,
         stats_file=stats_file,
+        reports_dir=reports_dir,
+        url_deadline_seconds=url_deadline_seconds,
+        worker_max_rss_mb=worker_max_rss_mb,
+        worker_max_cpu_percent=worker_max_cpu_percent,
+        provider_alerts_enabled=provider_alerts_enabled,
+        provider_alert_min_pages=provider_alert_min_pages,
+        provider_alert_min_ratio=provider_alert_min_ratio,
+        provider_stats_file=provider_stats_file,
     )
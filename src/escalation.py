@@ -2,7 +2,7 @@ import json
 import os
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -63,27 +63,44 @@ def should_alert_for_failure(count: int) -> bool:
     return False
 
 
-def update_status_for_check(stats_path: str, url: str, is_failure: bool) -> bool:
-    """
-    Обновляет статус URL с учётом результата прогона и возвращает, нужно ли отправлять алерт.
-    """
-    stats = load_stats(stats_path)
-    current = stats.get(url, UrlStatus(consecutive_failures=0, first_failure_ts=None, last_check_ts=None))
-
+def _apply_check(current: UrlStatus, is_failure: bool) -> bool:
     current.last_check_ts = _now_utc_str()
 
     if is_failure:
         if current.consecutive_failures == 0:
             current.first_failure_ts = current.last_check_ts
         current.consecutive_failures += 1
-        alert_now = should_alert_for_failure(current.consecutive_failures)
-    else:
-        # Восстановление — сброс счётчика и отметка времени
-        current.consecutive_failures = 0
-        current.first_failure_ts = None
-        alert_now = False
+        return should_alert_for_failure(current.consecutive_failures)
+
+    # Восстановление — сброс счётчика и отметка времени
+    current.consecutive_failures = 0
+    current.first_failure_ts = None
+    return False
 
+
+def update_status_for_check(stats_path: str, url: str, is_failure: bool) -> bool:
+    """
+    Обновляет статус URL с учётом результата прогона и возвращает, нужно ли отправлять алерт.
+    """
+    stats = load_stats(stats_path)
+    current = stats.get(url, UrlStatus(consecutive_failures=0, first_failure_ts=None, last_check_ts=None))
+    alert_now = _apply_check(current, is_failure)
     stats[url] = current
     save_stats(stats_path, stats)
     return alert_now
 
+
+def update_statuses_for_checks(stats_path: str, results: Dict[str, bool]) -> List[str]:
+    """
+    То же для пачки ключей (ключ -> есть_падение) за одно чтение/запись файла.
+    Возвращает ключи, по которым нужно отправить алерт.
+    """
+    stats = load_stats(stats_path)
+    to_alert: List[str] = []
+    for key, is_failure in results.items():
+        current = stats.get(key, UrlStatus(consecutive_failures=0, first_failure_ts=None, last_check_ts=None))
+        if _apply_check(current, is_failure):
+            to_alert.append(key)
+        stats[key] = current
+    save_stats(stats_path, stats)
+    return to_alert
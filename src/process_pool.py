@@ -0,0 +1,325 @@
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from multiprocessing.connection import wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# Как часто супервизор проверяет дедлайны и снимает RSS/CPU воркеров
+POLL_INTERVAL_SECONDS = 1.0
+# Сколько подряд замеров CPU выше лимита допускается до убийства воркера
+CPU_STRIKES_LIMIT = 5
+# Сколько ждём штатного завершения воркера при остановке пула
+SHUTDOWN_TIMEOUT_SECONDS = 10.0
+# Сколько падений воркеров подряд (без единого результата между ними) допускается,
+# прежде чем перестать их пересоздавать — например, если браузер не стартует вовсе
+MAX_CONSECUTIVE_CRASHES = 3
+
+
+@dataclass
+class CheckOutcome:
+    url: str
+    missing: List[str]
+    total: int
+    checked: int
+    started_at: datetime
+    duration_ms: int
+    error_class: Optional[str] = None
+    error_message: Optional[str] = None
+    # Ошибка инфраструктуры (зависание, падение или перерасход ресурсов воркера),
+    # а не результат проверки страницы
+    infra_error: bool = False
+    # Провайдеры проверенных карточек с именем из заголовка (для индекса провайдеров)
+    providers: List[str] = field(default_factory=list)
+
+
+def _worker_entry(target, cfg, conn) -> None:
+    # Своя сессия/группа процессов: chromedriver и Chrome наследуют её,
+    # и супервизор может убить всё дерево через killpg даже без psutil
+    if hasattr(os, "setsid"):
+        os.setsid()
+    target(cfg, conn)
+
+
+def _worker_main(cfg, conn) -> None:
+    """
+    Процесс-воркер: владеет своим браузером, получает URL из pipe и отправляет CheckOutcome.
+    None в pipe — сигнал завершения.
+    """
+    from src.logging_setup import setup_logging
+    from src.selenium_checker import build_driver, check_url_providers, is_browser_failure
+
+    setup_logging(cfg.log_dir)
+    driver = None
+    try:
+        while True:
+            url = conn.recv()
+            if url is None:
+                break
+            started_at, started = datetime.now(timezone.utc), time.monotonic()
+            try:
+                if driver is None:
+                    driver = build_driver(
+                        headless=cfg.headless,
+                        wait_seconds=cfg.wait_timeout_seconds,
+                        page_load_strategy=cfg.page_load_strategy,
+                        disable_images=cfg.disable_images,
+                        disable_css=cfg.disable_css,
+                        disable_fonts=cfg.disable_fonts,
+                    )
+                missing, providers, checked, total = check_url_providers(driver, url, cfg.wait_timeout_seconds)
+                outcome = CheckOutcome(
+                    url, missing, total, checked, started_at, int((time.monotonic() - started) * 1000),
+                    providers=providers,
+                )
+            except Exception as exc:  # noqa: BLE001
+                # driver is None — браузер не запустился; вместе с потерей сессии это сбой браузера, а не страницы
+                outcome = CheckOutcome(
+                    url, [], 0, 0, started_at, int((time.monotonic() - started) * 1000),
+                    error_class=type(exc).__name__, error_message=str(exc),
+                    infra_error=driver is None or is_browser_failure(exc),
+                )
+                # После ошибки драйвер может быть в неопределённом состоянии — пересоздадим на следующем URL
+                if driver is not None:
+                    try:
+                        driver.quit()
+                    except Exception:  # noqa: BLE001
+                        pass
+                    driver = None
+            conn.send(outcome)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        if driver is not None:
+            driver.quit()
+
+
+@dataclass
+class _Worker:
+    process: multiprocessing.process.BaseProcess
+    conn: multiprocessing.connection.Connection
+    url: Optional[str] = None
+    started_at: Optional[datetime] = None
+    started: float = 0.0
+    deadline: float = 0.0
+    last_sample: float = 0.0
+    cpu_strikes: int = 0
+    # psutil.Process по pid: cpu_percent() считает загрузку между вызовами одного объекта
+    tracked: Dict[int, object] = field(default_factory=dict)
+
+    def dispatch(self, url: str, deadline_seconds: int) -> None:
+        self.url = url
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.monotonic()
+        # 0 — дедлайн отключён
+        self.deadline = self.started + deadline_seconds if deadline_seconds > 0 else float("inf")
+        self.cpu_strikes = 0
+        self.conn.send(url)
+
+    def sample_usage(self, psutil) -> Tuple[int, float]:
+        """Суммарные RSS (байт) и CPU (%) процесса-воркера и всех его потомков (chromedriver, Chrome)."""
+        try:
+            root = psutil.Process(self.process.pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return 0, 0.0
+        rss = 0
+        cpu = 0.0
+        alive: Dict[int, object] = {}
+        for proc in procs:
+            proc = self.tracked.get(proc.pid, proc)
+            try:
+                rss += proc.memory_info().rss
+                cpu += proc.cpu_percent(None)
+            except psutil.Error:
+                continue
+            alive[proc.pid] = proc
+        self.tracked = alive
+        return rss, cpu
+
+    def kill(self, psutil) -> None:
+        """Убивает воркер вместе с деревом процессов браузера."""
+        procs = []
+        if psutil is not None:
+            try:
+                root = psutil.Process(self.process.pid)
+                procs = root.children(recursive=True)
+            except psutil.Error:
+                procs = []
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                # Воркер ещё не успел вызвать setsid или группа уже пуста
+                pass
+        self.process.kill()
+        for proc in procs:
+            try:
+                proc.kill()
+            except psutil.Error:
+                pass
+        self.process.join(timeout=SHUTDOWN_TIMEOUT_SECONDS)
+        self.conn.close()
+
+
+def _spawn(ctx, cfg) -> _Worker:
+    parent_conn, child_conn = ctx.Pipe()
+    process = ctx.Process(target=_worker_entry, args=(_worker_main, cfg, child_conn), daemon=True)
+    process.start()
+    child_conn.close()
+    return _Worker(process=process, conn=parent_conn)
+
+
+def _infra_outcome(worker: _Worker, error_class: str, message: str) -> CheckOutcome:
+    return CheckOutcome(
+        url=worker.url or "",
+        missing=[],
+        total=0,
+        checked=0,
+        started_at=worker.started_at or datetime.now(timezone.utc),
+        duration_ms=int((time.monotonic() - worker.started) * 1000),
+        error_class=error_class,
+        error_message=message,
+        infra_error=True,
+    )
+
+
+def _skipped_outcome(url: str, message: str) -> CheckOutcome:
+    return CheckOutcome(
+        url=url,
+        missing=[],
+        total=0,
+        checked=0,
+        started_at=datetime.now(timezone.utc),
+        duration_ms=0,
+        error_class="WorkerCrashLoop",
+        error_message=message,
+        infra_error=True,
+    )
+
+
+def _check_limits(worker: _Worker, cfg, psutil) -> Optional[Tuple[str, str]]:
+    """Возвращает (класс_ошибки, сообщение), если воркер нужно убить."""
+    now = time.monotonic()
+    if not worker.process.is_alive():
+        return "WorkerCrashed", f"процесс воркера завершился (код {worker.process.exitcode})"
+    if now >= worker.deadline:
+        return "WorkerDeadlineExceeded", f"проверка дольше {cfg.url_deadline_seconds} с"
+
+    if psutil is None or now - worker.last_sample < POLL_INTERVAL_SECONDS:
+        return None
+    worker.last_sample = now
+    rss, cpu = worker.sample_usage(psutil)
+    rss_mb = rss // (1024 * 1024)
+    if cfg.worker_max_rss_mb and rss_mb > cfg.worker_max_rss_mb:
+        return "WorkerMemoryLimit", f"RSS браузера {rss_mb} МБ > {cfg.worker_max_rss_mb} МБ"
+    if cfg.worker_max_cpu_percent and cpu > cfg.worker_max_cpu_percent:
+        worker.cpu_strikes += 1
+        if worker.cpu_strikes >= CPU_STRIKES_LIMIT:
+            return "WorkerCpuLimit", f"CPU браузера {cpu:.0f}% > {cfg.worker_max_cpu_percent}% {worker.cpu_strikes} замеров подряд"
+    else:
+        worker.cpu_strikes = 0
+    return None
+
+
+def iter_isolated_checks(cfg, urls: List[str], workers: int) -> Iterator[CheckOutcome]:
+    """
+    Проверяет URL в отдельных процессах (у каждого свой браузер) под надзором супервизора.
+    Супервизор следит за дедлайном на URL, RSS и CPU дерева процессов браузера;
+    зависший, упавший или перерасходовавший ресурсы воркер убивается и пересоздаётся,
+    а его URL возвращается как инфраструктурная ошибка (infra_error=True). Так же обрабатывается
+    сбой браузера внутри живого воркера: драйвер не запустился или сессия потеряна.
+    После MAX_CONSECUTIVE_CRASHES падений (включая сбои браузера) подряд воркеры больше не пересоздаются,
+    а оставшиеся URL возвращаются как WorkerCrashLoop. На каждый URL — ровно один результат,
+    результаты отдаются по мере готовности.
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+        if cfg.worker_max_rss_mb or cfg.worker_max_cpu_percent:
+            logging.warning("psutil не установлен: лимиты RSS/CPU воркеров не применяются, действует только дедлайн на URL")
+
+    ctx = multiprocessing.get_context("spawn")
+    pending = deque(urls)
+    pool = [_spawn(ctx, cfg) for _ in range(min(workers, len(urls)))]
+    crash_streak = 0
+    aborted = False
+
+    def replace(i: int, crashed: bool) -> None:
+        nonlocal crash_streak, aborted
+        pool[i].kill(psutil)
+        if crashed:
+            crash_streak += 1
+            if crash_streak >= MAX_CONSECUTIVE_CRASHES and not aborted:
+                aborted = True
+                logging.error(
+                    "Воркеры упали %d раз подряд без единого результата — больше не пересоздаю, оставшиеся URL: %d",
+                    crash_streak, len(pending),
+                )
+        if not aborted:
+            pool[i] = _spawn(ctx, cfg)
+
+    try:
+        while pending or any(w.url is not None for w in pool):
+            if aborted:
+                while pending:
+                    yield _skipped_outcome(pending.popleft(), f"не проверен: воркеры падают {crash_streak} раз подряд")
+            for worker in pool:
+                if worker.url is None and pending and not aborted:
+                    worker.dispatch(pending.popleft(), cfg.url_deadline_seconds)
+
+            busy = {w.conn: i for i, w in enumerate(pool) if w.url is not None}
+            if not busy:
+                continue
+            for conn in wait(list(busy), timeout=POLL_INTERVAL_SECONDS):
+                i = busy.pop(conn)
+                worker = pool[i]
+                try:
+                    outcome = conn.recv()
+                except (EOFError, OSError):
+                    # Pipe закрылся раньше, чем процесс успел завершиться — дождёмся кода выхода
+                    worker.process.join(timeout=POLL_INTERVAL_SECONDS)
+                    outcome = _infra_outcome(worker, "WorkerCrashed", f"процесс воркера завершился (код {worker.process.exitcode})")
+                    worker.url = None
+                    replace(i, crashed=True)
+                else:
+                    worker.url = None
+                    if outcome.infra_error:
+                        # Браузер не запустился или потерял сессию: процесс жив, но для лимита падений
+                        # это такой же сбой — иначе не стартующий Chrome никогда не остановит прогон
+                        logging.error("Воркер pid=%s (%s): сбой браузера — перезапускаю", worker.process.pid, outcome.url)
+                        replace(i, crashed=True)
+                    else:
+                        crash_streak = 0
+                yield outcome
+
+            for i in busy.values():
+                worker = pool[i]
+                violation = _check_limits(worker, cfg, psutil)
+                if violation is None:
+                    continue
+                error_class, message = violation
+                logging.error("Воркер pid=%s (%s): %s — перезапускаю", worker.process.pid, worker.url, message)
+                outcome = _infra_outcome(worker, error_class, message)
+                worker.url = None
+                replace(i, crashed=error_class == "WorkerCrashed")
+                yield outcome
+    finally:
+        for worker in pool:
+            if worker.url is None and worker.process.is_alive():
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+        for worker in pool:
+            worker.process.join(timeout=SHUTDOWN_TIMEOUT_SECONDS if worker.url is None else 0)
+            if worker.process.is_alive():
+                worker.kill(psutil)
+            else:
+                worker.conn.close()
@@ -0,0 +1,123 @@
+import json
+import os
+import re
+from array import array
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+
+# Сколько примеров страниц показывать в логе и алерте
+SAMPLE_URLS = 3
+
+
+def normalize_provider_name(name: str) -> str:
+    """Ключ провайдера: без регистра, кавычек и лишних пробелов («Ростелеком» == 'ростелеком ')."""
+    value = (name or "").replace("\xa0", " ")
+    value = re.sub(r"[«»\"“”„']", "", value)
+    return re.sub(r"\s+", " ", value).strip().casefold()
+
+
+@dataclass
+class _ProviderEntry:
+    name: str
+    # Номера страниц (индексы в ProviderIndex._urls), а не сами URL/WebElement —
+    # 4 байта на запись, чтобы индекс выдерживал десятки тысяч страниц
+    checked_pages: array = field(default_factory=lambda: array("I"))
+    missing_pages: array = field(default_factory=lambda: array("I"))
+
+
+@dataclass
+class ProviderSummary:
+    name: str
+    checked_pages: int
+    missing_pages: int
+    groups: List[str]
+    missing_urls: List[str]
+
+    @property
+    def missing_ratio(self) -> float:
+        return self.missing_pages / self.checked_pages if self.checked_pages else 0.0
+
+
+class ProviderIndex:
+    """
+    Индекс провайдер → страницы, на которых его карточка проверялась, и была ли там абонплата.
+    Заполняется по ходу прогона, в конце даёт сводку по провайдерам.
+    """
+
+    def __init__(self) -> None:
+        self._urls: List[str] = []
+        self._url_ids: Dict[str, int] = {}
+        self._page_group: array = array("I")
+        self._groups: List[str] = []
+        self._group_ids: Dict[str, int] = {}
+        self._providers: Dict[str, _ProviderEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._providers)
+
+    def _page_id(self, group: str, url: str) -> Tuple[int, bool]:
+        """Возвращает (номер_страницы, страница_новая)."""
+        page_id = self._url_ids.get(url)
+        if page_id is not None:
+            return page_id, False
+        group_id = self._group_ids.setdefault(group, len(self._groups))
+        if group_id == len(self._groups):
+            self._groups.append(group)
+        page_id = len(self._urls)
+        self._urls.append(url)
+        self._url_ids[url] = page_id
+        self._page_group.append(group_id)
+        return page_id, True
+
+    def add_page(self, group: str, url: str, checked_providers: Iterable[str], missing_providers: Iterable[str]) -> None:
+        """
+        Учитывает проверенную страницу. Если URL уже встречался (например, в двух группах),
+        записи не дублируются, а провайдер считается без абонплаты, если так было хотя бы в одной проверке.
+        """
+        page_id, is_new = self._page_id(group, url)
+        missing_keys = {normalize_provider_name(name) for name in missing_providers}
+        seen = set()
+        for name in checked_providers:
+            key = normalize_provider_name(name)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            entry = self._providers.get(key)
+            if entry is None:
+                entry = self._providers[key] = _ProviderEntry(name=name.strip())
+            # Линейный поиск только для повторного URL — основной путь остаётся O(1)
+            if is_new or page_id not in entry.checked_pages:
+                entry.checked_pages.append(page_id)
+            if key in missing_keys and (is_new or page_id not in entry.missing_pages):
+                entry.missing_pages.append(page_id)
+
+    def summary(self) -> List[ProviderSummary]:
+        """Сводка по провайдерам: сначала с наибольшим числом страниц без абонплаты."""
+        result: List[ProviderSummary] = []
+        for entry in self._providers.values():
+            group_ids = sorted({self._page_group[p] for p in entry.checked_pages})
+            result.append(
+                ProviderSummary(
+                    name=entry.name,
+                    checked_pages=len(entry.checked_pages),
+                    missing_pages=len(entry.missing_pages),
+                    groups=[self._groups[g] for g in group_ids],
+                    missing_urls=[self._urls[p] for p in entry.missing_pages],
+                )
+            )
+        result.sort(key=lambda s: (-s.missing_pages, -s.missing_ratio, s.name))
+        return result
+
+    def write_json(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        raw = [dict(asdict(s), missing_ratio=round(s.missing_ratio, 4)) for s in self.summary()]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(raw, f, ensure_ascii=False, indent=2)
+
+
+def select_alert_providers(summary: List[ProviderSummary], min_pages: int, min_ratio: float) -> List[ProviderSummary]:
+    """Провайдеры, у которых абонплата пропала массово: не меньше min_pages страниц и доли min_ratio."""
+    return [s for s in summary if s.missing_pages >= max(1, min_pages) and s.missing_ratio >= min_ratio]
@@ -0,0 +1,226 @@
+import glob
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+
+JSONL_EXT = ".jsonl"
+PARQUET_EXT = ".parquet"
+# Вид прогона — префикс имени файла: обычные прогоны и replay (только падающие URL) не смешиваются
+RUN_KINDS = ("run", "replay")
+
+
+def new_run_id() -> str:
+    # Микросекунды и pid: планировщик может запустить несколько прогонов в одну секунду
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}Z-{os.getpid()}"
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("run_id", pa.string()),
+            ("group", pa.string()),
+            ("url", pa.string()),
+            ("domain", pa.string()),
+            ("total_cards", pa.int32()),
+            ("checked_cards", pa.int32()),
+            ("missing_providers", pa.list_(pa.string())),
+            ("started_at", pa.timestamp("us", tz="UTC")),
+            ("duration_ms", pa.int64()),
+            ("engine", pa.string()),
+            ("error_class", pa.string()),
+        ]
+    )
+
+
+class RunReport:
+    """
+    Структурированный отчёт о прогоне: одна запись на URL.
+    Во время прогона пишется построчно в JSONL (переживает падение процесса),
+    в конце уплотняется в Parquet, если установлен pyarrow.
+    """
+
+    def __init__(self, reports_dir: str, run_id: Optional[str] = None, kind: str = "run") -> None:
+        if kind not in RUN_KINDS:
+            raise ValueError(f"Неизвестный вид прогона: {kind}")
+        self.run_id = run_id or new_run_id()
+        self.kind = kind
+        os.makedirs(reports_dir, exist_ok=True)
+        self.jsonl_path = os.path.join(reports_dir, f"{kind}-{self.run_id}{JSONL_EXT}")
+        self.parquet_path = os.path.join(reports_dir, f"{kind}-{self.run_id}{PARQUET_EXT}")
+        self._lock = threading.Lock()
+        # Уже уплотнённый отчёт с тем же именем: JSONL от него удалён, и "x" ниже его не заметит
+        if os.path.exists(self.parquet_path):
+            raise FileExistsError(f"Отчёт прогона уже существует: {self.parquet_path}")
+        # "x": чужой отчёт с тем же именем не дописываем, а падаем сразу
+        self._file = open(self.jsonl_path, "x", encoding="utf-8")
+
+    def record(
+        self,
+        group: str,
+        url: str,
+        total_cards: int,
+        checked_cards: int,
+        missing_providers: List[str],
+        started_at: datetime,
+        duration_ms: int,
+        engine: str,
+        error_class: Optional[str] = None,
+    ) -> None:
+        row = {
+            "run_id": self.run_id,
+            "group": group,
+            "url": url,
+            "domain": urlparse(url).netloc,
+            "total_cards": total_cards,
+            "checked_cards": checked_cards,
+            "missing_providers": list(missing_providers),
+            "started_at": started_at.astimezone(timezone.utc).isoformat(),
+            "duration_ms": duration_ms,
+            "engine": engine,
+            "error_class": error_class,
+        }
+        line = json.dumps(row, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> str:
+        """
+        Закрывает JSONL и уплотняет его в Parquet. Возвращает путь к итоговому файлу.
+        Без pyarrow отчёт остаётся в JSONL.
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            logging.warning("pyarrow не установлен, отчёт прогона оставлен в JSONL: %s", self.jsonl_path)
+            return self.jsonl_path
+
+        rows = _read_jsonl(self.jsonl_path)
+        for row in rows:
+            row["started_at"] = datetime.fromisoformat(row["started_at"])
+        table = pa.Table.from_pylist(rows, schema=_parquet_schema())
+        with open(self.parquet_path, "xb") as f:
+            pq.write_table(table, f)
+        os.remove(self.jsonl_path)
+        logging.info("Отчёт прогона: %s (записей: %d)", self.parquet_path, len(rows))
+        return self.parquet_path
+
+
+def _read_jsonl(path: str) -> List[dict]:
+    rows: List[dict] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            s = line.strip()
+            if not s:
+                continue
+            try:
+                rows.append(json.loads(s))
+            except json.JSONDecodeError:
+                # Последняя строка могла оборваться при падении процесса
+                logging.warning("Пропущена повреждённая строка отчёта в %s", path)
+    return rows
+
+
+def load_run(path: str) -> List[dict]:
+    if path.endswith(PARQUET_EXT):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path).to_pylist()
+    return _read_jsonl(path)
+
+
+def list_runs(reports_dir: str, kind: str = "run") -> List[str]:
+    """Файлы отчётов одного вида в хронологическом порядке (run_id сортируется как время)."""
+    paths = glob.glob(os.path.join(reports_dir, f"{kind}-*{PARQUET_EXT}"))
+    paths += glob.glob(os.path.join(reports_dir, f"{kind}-*{JSONL_EXT}"))
+    return sorted(paths, key=os.path.basename)
+
+
+def resolve_run(reports_dir: str, ref: str) -> str:
+    """Принимает путь к файлу отчёта или run_id."""
+    if os.path.isfile(ref):
+        return ref
+    for kind in RUN_KINDS:
+        for ext in (PARQUET_EXT, JSONL_EXT):
+            path = os.path.join(reports_dir, f"{kind}-{ref}{ext}")
+            if os.path.isfile(path):
+                return path
+    raise FileNotFoundError(f"Не найден отчёт прогона: {ref}")
+
+
+def run_groups(path: str) -> Set[str]:
+    if path.endswith(PARQUET_EXT):
+        import pyarrow.parquet as pq
+
+        return set(pq.read_table(path, columns=["group"]).column("group").to_pylist())
+    return {row["group"] for row in _read_jsonl(path)}
+
+
+def latest_comparable_runs(reports_dir: str) -> Optional[Tuple[str, str]]:
+    """
+    Последний обычный прогон и предыдущий прогон того же набора групп.
+    replay и прогоны других --group не сравниваются. None, если пары нет.
+    """
+    runs = list_runs(reports_dir)
+    if len(runs) < 2:
+        return None
+    new_path = runs[-1]
+    groups = run_groups(new_path)
+    for old_path in reversed(runs[:-1]):
+        if run_groups(old_path) == groups:
+            return old_path, new_path
+    return None
+
+
+def _is_broken(row: dict) -> bool:
+    return bool(row.get("error_class")) or bool(row.get("missing_providers"))
+
+
+def diff_runs(old_rows: List[dict], new_rows: List[dict]) -> Dict[str, list]:
+    """
+    Сравнивает два прогона по URL, присутствующим в обоих.
+    Страница сломана, если в ней есть провайдеры без абонплаты или ошибка проверки.
+    Провайдеры сравниваются только для страниц, проверенных без ошибки в обоих прогонах.
+    """
+    old_by_url = {row["url"]: row for row in old_rows}
+    new_by_url = {row["url"]: row for row in new_rows}
+    common = sorted(old_by_url.keys() & new_by_url.keys())
+
+    broken_pages: List[str] = []
+    fixed_pages: List[str] = []
+    broken_providers: List[Tuple[str, str]] = []
+    fixed_providers: List[Tuple[str, str]] = []
+
+    for url in common:
+        old, new = old_by_url[url], new_by_url[url]
+        old_broken, new_broken = _is_broken(old), _is_broken(new)
+        if new_broken and not old_broken:
+            broken_pages.append(url)
+        elif old_broken and not new_broken:
+            fixed_pages.append(url)
+
+        if old.get("error_class") or new.get("error_class"):
+            continue
+        old_missing: Set[str] = set(old.get("missing_providers") or [])
+        new_missing: Set[str] = set(new.get("missing_providers") or [])
+        broken_providers.extend((url, name) for name in sorted(new_missing - old_missing))
+        fixed_providers.extend((url, name) for name in sorted(old_missing - new_missing))
+
+    return {
+        "newly_broken_pages": broken_pages,
+        "newly_fixed_pages": fixed_pages,
+        "newly_broken_providers": broken_providers,
+        "newly_fixed_providers": fixed_providers,
+    }
@@ -1,3 +1,4 @@
+from contextlib import contextmanager
 from typing import List, Tuple
 import logging
 import re
@@ -7,11 +8,27 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    NoSuchDriverException,
+    NoSuchWindowException,
+    SessionNotCreatedException,
+    TimeoutException,
+    WebDriverException,
+)
 
 
 PROVIDER_CARD_XPATH = "//div[@data-sentry-component='ProviderCardFull']"
 BUTTON_IN_CARD_XPATH = ".//div[@data-sentry-element='TextPriceButtonTariff']"
+# Признаки потери сессии в сообщениях WebDriverException: упал рендерер, Chrome недоступен или закрыт
+BROWSER_LOST_MARKERS = (
+    "tab crashed",
+    "chrome not reachable",
+    "session deleted",
+    "disconnected",
+    "invalid session id",
+    "target window already closed",
+)
 
 
 def build_driver(
@@ -41,6 +58,19 @@ def build_driver(
     return driver
 
 
+def is_browser_failure(exc: BaseException) -> bool:
+    """
+    True, если ошибка про браузер, а не про страницу: драйвер не запустился или сессия потеряна
+    (упал рендерер, Chrome недоступен). Такая ошибка — инфраструктурная, драйвер после неё непригоден.
+    """
+    if isinstance(exc, (SessionNotCreatedException, NoSuchDriverException, InvalidSessionIdException, NoSuchWindowException)):
+        return True
+    if not isinstance(exc, WebDriverException) or isinstance(exc, TimeoutException):
+        return False
+    message = (exc.msg or str(exc)).lower()
+    return any(marker in message for marker in BROWSER_LOST_MARKERS)
+
+
 def _normalize_text(value: str) -> str:
     lowered = (value or "").replace("\xa0", " ").lower()
     return re.sub(r"\s+", " ", lowered).strip()
@@ -51,7 +81,19 @@ def _has_span_with_text(card, text: str) -> bool:
     return len(card.find_elements(By.XPATH, xp)) > 0
 
 
-def _extract_provider_name(card) -> str:
+@contextmanager
+def _implicit_wait(driver: webdriver.Chrome, seconds: float):
+    """Временно меняет implicit wait драйвера: иначе каждый не найденный XPath ждёт его целиком."""
+    previous = driver.timeouts.implicit_wait
+    driver.implicitly_wait(seconds)
+    try:
+        yield
+    finally:
+        driver.implicitly_wait(previous)
+
+
+def _extract_heading_name(card) -> str:
+    """Имя провайдера из заголовка карточки или пустая строка, если заголовка нет."""
     for xp in [
         ".//*[@role='heading']",
         ".//h1",
@@ -65,24 +107,30 @@ def _extract_provider_name(card) -> str:
             name = (el.text or "").strip()
             if name:
                 return name
+    return ""
+
+
+def _fallback_provider_name(card) -> str:
     text = (card.text or "").strip()
     if text:
         return text.splitlines()[0][:80]
     return "Неизвестный провайдер"
 
 
-def check_url_with_driver(driver: webdriver.Chrome, url: str, wait_seconds: int = 15) -> Tuple[List[str], int, int]:
+def check_url_providers(driver: webdriver.Chrome, url: str, wait_seconds: int = 15) -> Tuple[List[str], List[str], int, int]:
     """
     Проверка страницы, используя уже созданный драйвер.
-    Возвращает (провайдеры_без_абонплаты, всего_карточек, проверено_карточек).
+    Возвращает (провайдеры_без_абонплаты, провайдеры_проверенных_карточек, проверено_карточек, всего_карточек).
+    Во втором списке — только имена из заголовков карточек: запасные имена (первая строка текста,
+    «Неизвестный провайдер») не годятся как ключ для сопоставления провайдера между страницами.
     Логика выбора карточек:
     - Если карточек с кнопкой TextPriceButtonTariff меньше всех карточек — проверяем только их; иначе все.
     - Если карточек с кнопкой 0 — проверяем все карточки.
     - Карточка проверяется, если содержит «Скорость» и «Подключение». В такой карточке ищем «Абонентская плата».
     """
     missing: List[str] = []
+    providers: List[str] = []
     total_cards = 0
-    checked_cards = 0
 
     logging.info("Открываю URL: %s", url)
     try:
@@ -102,32 +150,45 @@ def check_url_with_driver(driver: webdriver.Chrome, url: str, wait_seconds: int
     total_cards = len(cards)
     logging.info("Найдено карточек провайдеров: %s", total_cards)
 
-    cards_with_button = [c for c in cards if len(c.find_elements(By.XPATH, BUTTON_IN_CARD_XPATH)) > 0]
-    num_with_button = len(cards_with_button)
-    if 0 < num_with_button < total_cards:
-        target_cards = cards_with_button
-        logging.info("Ориентируемся на карточки с кнопкой: %d из %d", len(target_cards), total_cards)
-    else:
-        target_cards = cards
-        if num_with_button == 0:
-            logging.info("Кнопок не найдено, проверяем все карточки: %d", len(target_cards))
+    # Карточки уже отрисованы, поэтому всё, что ищем внутри них, ищем без implicit wait:
+    # иначе каждая отсутствующая кнопка, «Скорость» или «Абонентская плата» стоит wait_seconds,
+    # и страница с массово сломанным шаблоном не укладывается в дедлайн на URL
+    checked_cards = []
+    with _implicit_wait(driver, 0):
+        cards_with_button = [c for c in cards if len(c.find_elements(By.XPATH, BUTTON_IN_CARD_XPATH)) > 0]
+        num_with_button = len(cards_with_button)
+        if 0 < num_with_button < total_cards:
+            target_cards = cards_with_button
+            logging.info("Ориентируемся на карточки с кнопкой: %d из %d", len(target_cards), total_cards)
         else:
-            logging.info("Кнопок не меньше карточек, проверяем все карточки: %d", len(target_cards))
-
-    for idx, card in enumerate(target_cards, start=1):
-        has_speed = _has_span_with_text(card, "Скорость")
-        has_connect = _has_span_with_text(card, "Подключение")
-        if not (has_speed and has_connect):
-            continue
-        checked_cards += 1
-
-        has_fee = _has_span_with_text(card, "Абонентская плата")
-        if not has_fee:
-            name = _extract_provider_name(card)
-            if not name:
-                name = f"Провайдер #{idx}"
-            missing.append(name)
+            target_cards = cards
+            if num_with_button == 0:
+                logging.info("Кнопок не найдено, проверяем все карточки: %d", len(target_cards))
+            else:
+                logging.info("Кнопок не меньше карточек, проверяем все карточки: %d", len(target_cards))
+
+        for card in target_cards:
+            has_speed = _has_span_with_text(card, "Скорость")
+            has_connect = _has_span_with_text(card, "Подключение")
+            if not (has_speed and has_connect):
+                continue
+            checked_cards.append(card)
+            # Имена нужны для всех проверенных карточек (индекс провайдеров)
+            heading = _extract_heading_name(card)
+            if heading:
+                providers.append(heading)
+            if not _has_span_with_text(card, "Абонентская плата"):
+                missing.append(heading or _fallback_provider_name(card))
+
+    return missing, providers, len(checked_cards), total_cards
 
+
+def check_url_with_driver(driver: webdriver.Chrome, url: str, wait_seconds: int = 15) -> Tuple[List[str], int, int]:
+    """
+    Проверка страницы, используя уже созданный драйвер.
+    Возвращает (провайдеры_без_абонплаты, всего_карточек, проверено_карточек).
+    """
+    missing, _providers, checked_cards, total_cards = check_url_providers(driver, url, wait_seconds)
     return missing, total_cards, checked_cards
 
 
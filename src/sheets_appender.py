@@ -2,8 +2,6 @@ import logging
 from typing import List, Optional
 from datetime import datetime, timezone
 
-import gspread
-
 
 def get_sheet_url(sheet_id: Optional[str]) -> Optional[str]:
     if not sheet_id:
@@ -23,6 +21,9 @@ def append_negative_result(
         logging.warning("Google Sheets не настроен (SHEET_ID/GOOGLE_SERVICE_ACCOUNT_JSON)")
         return False
 
+    # gspread импортируем лениво: тяжёлый импорт нужен только при реальной записи
+    import gspread
+
     try:
         client = gspread.service_account(filename=service_account_json)
         spreadsheet = client.open_by_key(sheet_id)
@@ -1,6 +1,5 @@
 from typing import Optional
 import logging
-import requests
 
 
 def send_telegram_alert(enabled: bool, bot_token: Optional[str], chat_id: Optional[str], message: str) -> None:
@@ -9,6 +8,8 @@ def send_telegram_alert(enabled: bool, bot_token: Optional[str], chat_id: Option
     if not bot_token or not chat_id:
         logging.warning("Телеграм-алерт включён, но не задан BOT_TOKEN/CHAT_ID")
         return
+    import requests
+
     try:
         url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
         resp = requests.post(url, json={"chat_id": chat_id, "text": message})
@@ -2,8 +2,6 @@ import glob
 import os
 from typing import Dict, List
 
-from openpyxl import load_workbook
-
 
 def read_urls_from_txt_dir(dir_path: str) -> Dict[str, List[str]]:
     groups: Dict[str, List[str]] = {}
@@ -22,6 +20,9 @@ def read_urls_from_txt_dir(dir_path: str) -> Dict[str, List[str]]:
 
 
 def read_urls_from_xlsx(file_path: str) -> Dict[str, List[str]]:
+    # openpyxl нужен только для .xlsx — не тянем его при чтении .txt
+    from openpyxl import load_workbook
+
     wb = load_workbook(filename=file_path, read_only=True, data_only=True)
     groups: Dict[str, List[str]] = {}
     for ws in wb.worksheets:
@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# run_checks.py сам грузит .env через python-dotenv — без него CLI не стартует
+pytest.importorskip("dotenv")
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+_SCRIPT = os.path.join(_ROOT, "run_checks.py")
+
+# Модули, которые не должны загружаться подкомандами без браузера
+HEAVY_MODULES = ("selenium", "gspread", "requests", "openpyxl")
+
+# Бюджет на суммарное время импортов (мкс), можно переопределить на медленных агентах
+IMPORT_BUDGET_US = int(os.getenv("CLI_IMPORT_BUDGET_US", "500000"))
+
+
+def _run_with_importtime(args: list[str], tmp_path) -> tuple[subprocess.CompletedProcess, dict[str, int], int]:
+    urls_dir = tmp_path / "urls"
+    urls_dir.mkdir(exist_ok=True)
+    (urls_dir / "mol.txt").write_text("https://example.com/moskva\nhttps://example.com/spb\n", encoding="utf-8")
+
+    env = dict(os.environ)
+    env.update(
+        {
+            "URLS_DIR": str(urls_dir),
+            "LOG_DIR": str(tmp_path / "logs"),
+            "STATS_FILE": str(tmp_path / "stat_prov.json"),
+        }
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", _SCRIPT, *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=str(tmp_path),
+    )
+
+    # Формат строки: "import time: self [us] | cumulative | imported package"
+    modules: dict[str, int] = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative = int(parts[1])
+        except ValueError:
+            continue  # заголовок
+        name = parts[2]
+        modules[name.strip()] = cumulative
+        # Вложенность обозначается отступом; верхний уровень — ровно один пробел
+        if not name[1:].startswith(" "):
+            total_us += cumulative
+    return proc, modules, total_us
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["list-groups"],
+        ["validate"],
+        ["state-show"],
+    ],
+)
+def test_cli_startup_without_heavy_backends(args, tmp_path):
+    proc, modules, total_us = _run_with_importtime(args, tmp_path)
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+
+    heavy = sorted(m for m in modules if m.split(".")[0] in HEAVY_MODULES)
+    assert not heavy, f"{args[0]} импортирует тяжёлые модули: {', '.join(heavy)}"
+
+    assert total_us <= IMPORT_BUDGET_US, f"{args[0]}: импорты {total_us} мкс > бюджета {IMPORT_BUDGET_US} мкс"
@@ -0,0 +1,24 @@
+import os as _os
+import sys as _sys
+
+_ROOT = _os.path.dirname(_os.path.abspath(__file__))
+_SRC = _os.path.join(_ROOT, "..", "src")
+if _ROOT not in _sys.path:
+    _sys.path.append(_ROOT)
+if _SRC not in _sys.path:
+    _sys.path.append(_SRC)
+
+from escalation import load_stats, update_statuses_for_checks
+
+
+def test_update_statuses_for_checks_follows_escalation_schedule(tmp_path):
+    path = str(tmp_path / "stat_providers.json")
+
+    alerted_runs = []
+    for run in range(1, 21):
+        if update_statuses_for_checks(path, {"мтс": True, "билайн": False}) == ["мтс"]:
+            alerted_runs.append(run)
+    assert alerted_runs == [1, 4, 12, 20]
+
+    assert update_statuses_for_checks(path, {"мтс": False}) == []
+    assert load_stats(path)["мтс"].consecutive_failures == 0
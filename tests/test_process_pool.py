@@ -0,0 +1,199 @@
+import os as _os
+import sys as _sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+_ROOT = _os.path.dirname(_os.path.abspath(__file__))
+_SRC = _os.path.join(_ROOT, "..", "src")
+if _ROOT not in _sys.path:
+    _sys.path.append(_ROOT)
+if _SRC not in _sys.path:
+    _sys.path.append(_SRC)
+
+import process_pool
+from process_pool import CheckOutcome, iter_isolated_checks
+
+
+def _stub_worker(cfg, conn) -> None:
+    """Заглушка воркера без браузера: поведение задаётся словом в URL."""
+    while True:
+        url = conn.recv()
+        if url is None:
+            return
+        if "hang" in url:
+            time.sleep(60)
+        if "crash" in url:
+            _os._exit(3)
+        if "slow" in url:
+            time.sleep(1.5)
+        if "nobrowser" in url:
+            # Процесс жив, но Chrome не стартует — как при ошибке build_driver()
+            conn.send(
+                CheckOutcome(
+                    url, [], 0, 0, datetime.now(timezone.utc), 0,
+                    error_class="SessionNotCreatedException", error_message="session not created", infra_error=True,
+                )
+            )
+            continue
+        conn.send(CheckOutcome(url, [], 3, 2, datetime.now(timezone.utc), 0, providers=["МТС", "Билайн"]))
+
+
+class _SlowPageCard:
+    """Карточка, в которой каждый поиск без результата ждёт implicit wait драйвера, как в Selenium."""
+
+    def __init__(self, driver, name: str, spans) -> None:
+        self.driver = driver
+        self.text = name
+        self.spans = spans
+
+    def find_elements(self, by, xpath):
+        if "heading" in xpath:
+            found = [SimpleNamespace(text=self.text)]
+        else:
+            found = [self for span in self.spans if f"'{span}'" in xpath]
+        if not found:
+            time.sleep(self.driver.implicit_wait)
+        return found
+
+
+class _SlowPageDriver:
+    def __init__(self, implicit_wait: float, broken_cards: int) -> None:
+        self.implicit_wait = implicit_wait
+        self.cards = [_SlowPageCard(self, f"Провайдер {i}", ["Скорость", "Подключение"]) for i in range(broken_cards)]
+        self.cards.append(_SlowPageCard(self, "МТС", ["Скорость", "Подключение", "Абонентская плата"]))
+
+    @property
+    def timeouts(self):
+        return SimpleNamespace(implicit_wait=self.implicit_wait)
+
+    def implicitly_wait(self, seconds: float) -> None:
+        self.implicit_wait = seconds
+
+    def get(self, url: str) -> None:
+        pass
+
+    def find_element(self, by, xpath):
+        return self.cards[0]
+
+    def find_elements(self, by, xpath):
+        return self.cards
+
+
+def _slow_page_worker(cfg, conn) -> None:
+    """Заглушка воркера с настоящим check_url_providers: 12 карточек без абонплаты, implicit wait 0.5 с."""
+    from selenium_checker import check_url_providers
+
+    while True:
+        url = conn.recv()
+        if url is None:
+            return
+        started_at, started = datetime.now(timezone.utc), time.monotonic()
+        missing, providers, checked, total = check_url_providers(_SlowPageDriver(0.5, 12), url, wait_seconds=1)
+        conn.send(CheckOutcome(url, missing, total, checked, started_at, int((time.monotonic() - started) * 1000), providers=providers))
+
+
+def _cfg(url_deadline_seconds: int = 2) -> SimpleNamespace:
+    return SimpleNamespace(url_deadline_seconds=url_deadline_seconds, worker_max_rss_mb=0, worker_max_cpu_percent=0)
+
+
+@pytest.fixture
+def spawned(monkeypatch):
+    """Подменяет воркер заглушкой и считает запуски процессов."""
+    calls = []
+    original_spawn = process_pool._spawn
+
+    def counting_spawn(ctx, cfg):
+        calls.append(1)
+        return original_spawn(ctx, cfg)
+
+    monkeypatch.setattr(process_pool, "_worker_main", _stub_worker)
+    monkeypatch.setattr(process_pool, "_spawn", counting_spawn)
+    monkeypatch.setattr(process_pool, "POLL_INTERVAL_SECONDS", 0.2)
+    return calls
+
+
+def _outcomes_by_url(outcomes):
+    urls = [o.url for o in outcomes]
+    assert len(urls) == len(set(urls)), "на каждый URL должен быть ровно один результат"
+    return {o.url: o for o in outcomes}
+
+
+def test_supervisor_kills_hung_and_crashed_workers(spawned):
+    urls = ["https://a/ok1", "https://a/hang", "https://a/crash", "https://a/ok2", "https://a/ok3"]
+    by_url = _outcomes_by_url(list(iter_isolated_checks(_cfg(), urls, workers=2)))
+
+    assert set(by_url) == set(urls)
+    assert by_url["https://a/hang"].error_class == "WorkerDeadlineExceeded"
+    assert by_url["https://a/hang"].infra_error
+    assert by_url["https://a/crash"].error_class == "WorkerCrashed"
+    assert by_url["https://a/crash"].infra_error
+    for url in ("https://a/ok1", "https://a/ok2", "https://a/ok3"):
+        assert by_url[url].error_class is None
+        assert not by_url[url].infra_error
+        assert by_url[url].providers == ["МТС", "Билайн"]
+
+    # 2 исходных воркера + по одному пересозданию после зависания и падения
+    assert len(spawned) == 4
+
+
+def test_supervisor_stops_respawning_after_crash_loop(spawned):
+    urls = [f"https://a/crash{i}" for i in range(8)]
+    by_url = _outcomes_by_url(list(iter_isolated_checks(_cfg(), urls, workers=2)))
+
+    assert set(by_url) == set(urls)
+    assert all(o.infra_error for o in by_url.values())
+    assert {o.error_class for o in by_url.values()} == {"WorkerCrashed", "WorkerCrashLoop"}
+    assert len(spawned) <= 2 + process_pool.MAX_CONSECUTIVE_CRASHES - 1
+
+
+def test_browser_start_failures_count_towards_crash_loop(spawned):
+    urls = [f"https://a/nobrowser{i}" for i in range(8)]
+    by_url = _outcomes_by_url(list(iter_isolated_checks(_cfg(), urls, workers=2)))
+
+    assert set(by_url) == set(urls)
+    assert all(o.infra_error for o in by_url.values())
+    assert {o.error_class for o in by_url.values()} == {"SessionNotCreatedException", "WorkerCrashLoop"}
+    assert len(spawned) <= 2 + process_pool.MAX_CONSECUTIVE_CRASHES - 1
+
+
+def test_browser_failures_are_infra_errors():
+    pytest.importorskip("selenium")
+    from selenium.common.exceptions import (
+        InvalidSessionIdException,
+        NoSuchElementException,
+        SessionNotCreatedException,
+        TimeoutException,
+        WebDriverException,
+    )
+    from selenium_checker import is_browser_failure
+
+    assert is_browser_failure(SessionNotCreatedException("session not created"))
+    assert is_browser_failure(InvalidSessionIdException("invalid session id"))
+    assert is_browser_failure(WebDriverException("unknown error: session deleted because of page crash\nfrom tab crashed"))
+    assert is_browser_failure(WebDriverException("chrome not reachable"))
+    assert not is_browser_failure(TimeoutException("timeout"))
+    assert not is_browser_failure(NoSuchElementException("no such element"))
+    assert not is_browser_failure(ValueError("tab crashed"))
+
+
+def test_zero_deadline_disables_limit(spawned):
+    by_url = _outcomes_by_url(list(iter_isolated_checks(_cfg(url_deadline_seconds=0), ["https://a/slow"], workers=1)))
+
+    assert by_url["https://a/slow"].error_class is None
+    assert len(spawned) == 1
+
+
+def test_slow_page_with_missing_fees_is_not_infra_error(spawned, monkeypatch):
+    pytest.importorskip("selenium")
+    monkeypatch.setattr(process_pool, "_worker_main", _slow_page_worker)
+
+    by_url = _outcomes_by_url(list(iter_isolated_checks(_cfg(url_deadline_seconds=3), ["https://a/broken"], workers=1)))
+
+    outcome = by_url["https://a/broken"]
+    assert outcome.error_class is None
+    assert not outcome.infra_error
+    assert len(outcome.missing) == 12
+    assert outcome.providers[-1] == "МТС"
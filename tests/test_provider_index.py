@@ -0,0 +1,34 @@
+import os as _os
+import sys as _sys
+
+_ROOT = _os.path.dirname(_os.path.abspath(__file__))
+_SRC = _os.path.join(_ROOT, "..", "src")
+if _ROOT not in _sys.path:
+    _sys.path.append(_ROOT)
+if _SRC not in _sys.path:
+    _sys.path.append(_SRC)
+
+from provider_index import ProviderIndex, select_alert_providers
+
+
+def test_provider_index_aggregates_pages_and_groups():
+    index = ProviderIndex()
+    index.add_page("mol", "https://example.com/a", ["МТС", "Билайн"], ["МТС"])
+    index.add_page("mol", "https://example.com/b", ["мтс ", "Билайн"], ["мтс "])
+    index.add_page("pol", "https://example.com/c", ["«МТС»", "Билайн"], [])
+    # Тот же URL в другой группе не дублирует страницу
+    index.add_page("pol", "https://example.com/a", ["МТС"], ["МТС"])
+
+    summary = {s.name: s for s in index.summary()}
+    assert len(index) == 2
+
+    mts = summary["МТС"]
+    assert (mts.checked_pages, mts.missing_pages) == (3, 2)
+    assert mts.groups == ["mol", "pol"]
+    assert mts.missing_urls == ["https://example.com/a", "https://example.com/b"]
+
+    beeline = summary["Билайн"]
+    assert (beeline.checked_pages, beeline.missing_pages) == (3, 0)
+
+    flagged = select_alert_providers(index.summary(), min_pages=2, min_ratio=0.5)
+    assert [s.name for s in flagged] == ["МТС"]
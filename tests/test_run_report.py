@@ -0,0 +1,94 @@
+import os as _os
+import sys as _sys
+from datetime import datetime, timezone
+
+import pytest
+
+_ROOT = _os.path.dirname(_os.path.abspath(__file__))
+_SRC = _os.path.join(_ROOT, "..", "src")
+if _ROOT not in _sys.path:
+    _sys.path.append(_ROOT)
+if _SRC not in _sys.path:
+    _sys.path.append(_SRC)
+
+from run_report import RunReport, diff_runs, latest_comparable_runs, list_runs, load_run, new_run_id, resolve_run
+
+
+def _write_run(reports_dir: str, run_id: str, results: dict, group: str = "mol", kind: str = "run") -> str:
+    report = RunReport(reports_dir, run_id=run_id, kind=kind)
+    started_at = datetime.now(timezone.utc)
+    for url, (missing, error_class) in results.items():
+        report.record(group, url, 5, 4, missing, started_at, 1200, "selenium/serial", error_class)
+    return report.close()
+
+
+def test_run_report_roundtrip(tmp_path):
+    path = _write_run(str(tmp_path), "20260101T000000Z", {"https://example.com/spb": (["Билайн"], None)})
+
+    rows = load_run(path)
+    assert len(rows) == 1
+    row = rows[0]
+    assert row["run_id"] == "20260101T000000Z"
+    assert row["domain"] == "example.com"
+    assert row["missing_providers"] == ["Билайн"]
+    assert row["error_class"] is None
+    assert resolve_run(str(tmp_path), "20260101T000000Z") == path
+
+
+def test_diff_runs(tmp_path):
+    reports_dir = str(tmp_path)
+    _write_run(
+        reports_dir,
+        "20260101T000000Z",
+        {
+            "https://example.com/a": ([], None),
+            "https://example.com/b": (["МТС"], None),
+            "https://example.com/c": (["Билайн"], None),
+            "https://example.com/d": ([], None),
+        },
+    )
+    _write_run(
+        reports_dir,
+        "20260102T000000Z",
+        {
+            "https://example.com/a": (["Ростелеком"], None),
+            "https://example.com/b": ([], None),
+            "https://example.com/c": (["Билайн", "МТС"], None),
+            "https://example.com/d": ([], "TimeoutException"),
+        },
+    )
+
+    old_path, new_path = list_runs(reports_dir)
+    result = diff_runs(load_run(old_path), load_run(new_path))
+
+    assert result["newly_broken_pages"] == ["https://example.com/a", "https://example.com/d"]
+    assert result["newly_fixed_pages"] == ["https://example.com/b"]
+    assert result["newly_broken_providers"] == [
+        ("https://example.com/a", "Ростелеком"),
+        ("https://example.com/c", "МТС"),
+    ]
+    assert result["newly_fixed_providers"] == [("https://example.com/b", "МТС")]
+
+
+def test_run_ids_do_not_collide(tmp_path):
+    assert new_run_id() != new_run_id()
+
+    # Незакрытый отчёт (JSONL) и уже уплотнённый (Parquet, если есть pyarrow) одинаково защищены
+    in_progress = RunReport(str(tmp_path), run_id="20260101T000000000000Z-1")
+    with pytest.raises(FileExistsError):
+        RunReport(str(tmp_path), run_id="20260101T000000000000Z-1")
+    in_progress.close()
+
+    _write_run(str(tmp_path), "20260101T000000000000Z-2", {"https://example.com/a": ([], None)})
+    with pytest.raises(FileExistsError):
+        RunReport(str(tmp_path), run_id="20260101T000000000000Z-2")
+
+
+def test_latest_comparable_runs_skips_replay_and_other_groups(tmp_path):
+    reports_dir = str(tmp_path)
+    old_path = _write_run(reports_dir, "20260101T000000Z", {"https://example.com/a": ([], None)})
+    _write_run(reports_dir, "20260102T000000Z", {"https://example.com/p": ([], None)}, group="pol")
+    _write_run(reports_dir, "20260103T000000Z", {"https://example.com/a": (["МТС"], None)}, kind="replay")
+    new_path = _write_run(reports_dir, "20260104T000000Z", {"https://example.com/a": ([], None)})
+
+    assert latest_comparable_runs(reports_dir) == (old_path, new_path)